@@ -4,9 +4,15 @@ from __future__ import annotations
 
 import argparse
 import json
+import mmap
+import os
 import re
+import stat
 import sys
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any
 
 SEMVER_PATTERN = (
     r"(0|[1-9][0-9]*)"
@@ -16,7 +22,18 @@ SEMVER_PATTERN = (
     r"(\+[0-9A-Za-z.-]+)?"
 )
 SEMVER_RE = re.compile(rf"^{SEMVER_PATTERN}$")
-TAG_RE = re.compile(rf"^v{SEMVER_PATTERN}$")
+
+TOML_SECTION_RE = re.compile(rb"^[ \t]*\[(.*)\][ \t]*\r?$", re.MULTILINE)
+TOML_VERSION_RE = re.compile(rb'^[ \t]*version[ \t]*=[ \t]*"([^"]+)"', re.MULTILINE)
+JSON_TOP_VERSION_RE = re.compile(rb'^  "version"[ \t]*:[ \t]*"([^"]+)"', re.MULTILINE)
+# Cargo.lock patterns operate on raw bytes so lockfiles can be scanned
+# straight from an mmap without decoding or splitting the whole file.
+LOCK_PACKAGE_HEADER = b"[[package]]"
+LOCK_NAME_RE = re.compile(rb'^[ \t]*name[ \t]*=[ \t]*"([^"]+)"[ \t]*\r?$', re.MULTILINE)
+LOCK_VERSION_RE = re.compile(
+    rb'^[ \t]*version[ \t]*=[ \t]*"([^"]+)"[ \t]*\r?$', re.MULTILINE
+)
+LOCK_SOURCE_RE = re.compile(rb"^[ \t]*source = ", re.MULTILINE)
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 
@@ -40,8 +57,25 @@ LOCK_PACKAGE_VERSION_FILES = [
     (Path("desktop/src-tauri-cef/Cargo.lock"), "opencode-studio-desktop"),
 ]
 
-
-class VersionSyncError(RuntimeError):
+# Stat signatures of every file from the last successful `set`, so re-applying
+# the same version can skip files that have not been touched since.
+SET_CACHE_FILE = Path(".version_sync_cache.json")
+# Like git's "racy" index entries: an entry whose mtime falls within this
+# window of the cache being written (normally a file rewritten by the same set)
+# is not trusted, since a later edit inside the same timestamp tick would not
+# move it. Edits that deliberately restore an older mtime, e.g. with
+# `touch -r`, to a file the last set did not rewrite are not detected.
+RACY_MTIME_SLACK_NS = 2_000_000_000
+
+# Per-invocation caches keyed by resolved path, so a file that is scanned,
+# parsed and then rewritten within one command is only read and parsed once.
+# run_check and run_set clear them first; they must not outlive one command.
+_TEXT_CACHE: dict[str, str] = {}
+_JSON_CACHE: dict[str, Any] = {}
+_LOCK_INDEX_CACHE: dict[str, dict[str, tuple[str, int, int] | None]] = {}
+
+
+class VersionSyncError(Exception):
     pass
 
 
@@ -49,100 +83,172 @@ def repo_path(relative_path: Path) -> Path:
     return REPO_ROOT / relative_path
 
 
+def is_semver(value: str) -> bool:
+    # Plain MAJOR.MINOR.PATCH is the common case; only prerelease/build
+    # versions need the full pattern.
+    parts = value.split(".")
+    if len(parts) == 3 and all(
+        part.isascii() and part.isdigit() and (part == "0" or part[0] != "0")
+        for part in parts
+    ):
+        return True
+    return SEMVER_RE.fullmatch(value) is not None
+
+
+def ensure_semver(version: str, path: Path) -> str:
+    if not is_semver(version):
+        raise VersionSyncError(f"Invalid semver in {path}: '{version}'")
+    return version
+
+
 def normalize_version(raw: str) -> str:
     candidate = raw.strip()
     if candidate.startswith("v"):
         candidate = candidate[1:]
-    if not SEMVER_RE.fullmatch(candidate):
+    if not is_semver(candidate):
         raise VersionSyncError(
             f"Invalid version '{raw}'. Expected semver like 0.1.0 or 0.1.0-beta.1"
         )
     return candidate
 
 
-def read_file(path: Path) -> str:
-    return path.read_text(encoding="utf-8")
+def cache_key(path: Path) -> str:
+    return str(path.resolve())
 
 
-def write_file(path: Path, content: str) -> None:
-    path.write_text(content, encoding="utf-8")
+def clear_caches() -> None:
+    _TEXT_CACHE.clear()
+    _JSON_CACHE.clear()
+    _LOCK_INDEX_CACHE.clear()
 
 
-def split_line_ending(line: str) -> tuple[str, str]:
-    if line.endswith("\r\n"):
-        return line[:-2], "\r\n"
-    if line.endswith("\n"):
-        return line[:-1], "\n"
-    if line.endswith("\r"):
-        return line[:-1], "\r"
-    return line, ""
+def read_file(path: Path) -> str:
+    key = cache_key(path)
+    content = _TEXT_CACHE.get(key)
+    if content is None:
+        content = path.read_text(encoding="utf-8")
+        _TEXT_CACHE[key] = content
+    return content
+
+
+def load_json(path: Path) -> Any:
+    key = cache_key(path)
+    if key not in _JSON_CACHE:
+        _JSON_CACHE[key] = json.loads(read_file(path))
+    return _JSON_CACHE[key]
+
+
+def write_file_bytes(path: Path, data: bytes) -> None:
+    # Write through a sibling temp file so an interrupted run never leaves a
+    # truncated manifest behind. Resolve symlinks first so the link target is
+    # updated rather than the link being replaced by a regular file.
+    target = Path(os.path.realpath(path))
+    tmp_path = target.with_name(f"{target.name}.tmp")
+    try:
+        mode: int | None = stat.S_IMODE(target.stat().st_mode)
+    except FileNotFoundError:
+        mode = None
+    remaining = memoryview(data)
 
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        try:
+            if mode is not None and hasattr(os, "fchmod"):
+                # os.open's mode is masked by the umask; restore the exact bits.
+                os.fchmod(fd, mode)
+            while remaining:
+                remaining = remaining[os.write(fd, remaining) :]
+            # Without this, a crash after os.replace can leave an empty file
+            # in place of the manifest on some filesystems.
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    key = cache_key(path)
+    _TEXT_CACHE.pop(key, None)
+    _JSON_CACHE.pop(key, None)
+    _LOCK_INDEX_CACHE.pop(key, None)
 
-def read_toml_package_version(path: Path) -> str:
-    lines = read_file(path).splitlines()
-    in_package = False
 
-    for line in lines:
-        stripped = line.strip()
-        if stripped.startswith("[") and stripped.endswith("]"):
-            in_package = stripped == "[package]"
-            continue
-        if not in_package:
+def write_file(path: Path, content: str) -> None:
+    # Match Path.write_text newline translation.
+    if os.linesep != "\n":
+        content_on_disk = content.replace("\n", os.linesep)
+    else:
+        content_on_disk = content
+    write_file_bytes(path, content_on_disk.encode("utf-8"))
+
+
+def find_toml_package_version(data: bytes) -> re.Match[bytes] | None:
+    sections = list(TOML_SECTION_RE.finditer(data))
+    for pos, section in enumerate(sections):
+        if section.group(1) != b"package":
             continue
-        match = re.match(r'^\s*version\s*=\s*"([^"]+)"', line)
+        end = sections[pos + 1].start() if pos + 1 < len(sections) else len(data)
+        match = TOML_VERSION_RE.search(data, section.end(), end)
         if match:
-            return match.group(1)
+            return match
+    return None
 
-    raise VersionSyncError(f"Cannot find [package] version in {path}")
 
+def read_toml_package_version(path: Path) -> str:
+    match = find_toml_package_version(path.read_bytes())
+    if match is None:
+        raise VersionSyncError(f"Cannot find [package] version in {path}")
+    return ensure_semver(match.group(1).decode("utf-8"), path)
 
-def write_toml_package_version(path: Path, new_version: str) -> bool:
-    lines = read_file(path).splitlines(keepends=True)
-    in_package = False
-
-    for idx, line in enumerate(lines):
-        stripped = line.strip()
-        if stripped.startswith("[") and stripped.endswith("]"):
-            in_package = stripped == "[package]"
-            continue
-        if not in_package:
-            continue
-
-        line_body, line_ending = split_line_ending(line)
-        match = re.match(r'^(\s*version\s*=\s*")([^"]+)(".*)$', line_body)
-        if not match:
-            continue
 
-        if match.group(2) == new_version:
-            return False
+def write_toml_package_version(path: Path, new_version: str) -> bool:
+    data = path.read_bytes()
+    match = find_toml_package_version(data)
+    if match is None:
+        raise VersionSyncError(f"Cannot update [package] version in {path}")
 
-        lines[idx] = f"{match.group(1)}{new_version}{match.group(3)}{line_ending}"
-        write_file(path, "".join(lines))
-        return True
+    encoded = new_version.encode("utf-8")
+    if match.group(1) == encoded:
+        return False
 
-    raise VersionSyncError(f"Cannot update [package] version in {path}")
+    start, end = match.span(1)
+    write_file_bytes(path, data[:start] + encoded + data[end:])
+    return True
 
 
 def read_json_version(path: Path) -> str:
-    data = json.loads(read_file(path))
+    data = load_json(path)
     version = str(data.get("version", "")).strip()
     if not version:
         raise VersionSyncError(f"Cannot find JSON version field in {path}")
-    return version
+    return ensure_semver(version, path)
 
 
 def write_json_version(path: Path, new_version: str) -> bool:
-    data = json.loads(read_file(path))
-    if data.get("version") == new_version:
+    # Splice the top-level value on raw bytes, like the TOML writer, so line
+    # endings and every other byte of the file are kept as they are.
+    data = path.read_bytes()
+    top_level = JSON_TOP_VERSION_RE.search(data)
+    if top_level is not None:
+        encoded = new_version.encode("utf-8")
+        if top_level.group(1) == encoded:
+            return False
+        start, end = top_level.span(1)
+        write_file_bytes(path, data[:start] + encoded + data[end:])
+        return True
+
+    document = json.loads(data)
+    if document.get("version") == new_version:
         return False
 
-    data["version"] = new_version
-    write_file(path, json.dumps(data, indent=2, ensure_ascii=True) + "\n")
+    document["version"] = new_version
+    write_file(path, json.dumps(document, indent=2, ensure_ascii=True) + "\n")
     return True
 
 
 def read_package_lock_version(path: Path) -> str:
-    data = json.loads(read_file(path))
+    data = load_json(path)
     top_level = str(data.get("version", "")).strip()
     root_package = str(data.get("packages", {}).get("", {}).get("version", "")).strip()
 
@@ -155,11 +261,11 @@ def read_package_lock_version(path: Path) -> str:
             f"package-lock internal mismatch in {path}: top-level={top_level}, packages['']={root_package}"
         )
 
-    return top_level
+    return ensure_semver(top_level, path)
 
 
 def write_package_lock_version(path: Path, new_version: str) -> bool:
-    data = json.loads(read_file(path))
+    data = load_json(path)
     changed = False
 
     if data.get("version") != new_version:
@@ -184,123 +290,183 @@ def write_package_lock_version(path: Path, new_version: str) -> bool:
     return changed
 
 
-def read_lock_package_version(path: Path, package_name: str) -> str:
-    lines = read_file(path).splitlines()
-    idx = 0
+# Lockfile scanning locates candidates with bytes.find (a vectorized memchr /
+# memmem scan in CPython) and only runs the anchored line patterns at those
+# offsets, instead of letting a MULTILINE regex probe every line start.
+def find_lock_package_headers(data: bytes | mmap.mmap) -> list[tuple[int, int]]:
+    headers: list[tuple[int, int]] = []
+    pos = data.find(LOCK_PACKAGE_HEADER)
+
+    while pos >= 0:
+        header_end = pos + len(LOCK_PACKAGE_HEADER)
+        line_start = data.rfind(b"\n", 0, pos) + 1
+        line_end = data.find(b"\n", header_end)
+        if line_end < 0:
+            line_end = len(data)
+
+        prefix = data[line_start:pos]
+        suffix = data[header_end:line_end]
+        if not prefix.strip(b" \t") and not suffix.strip(b" \t\r"):
+            headers.append((line_start, line_end))
+        pos = data.find(LOCK_PACKAGE_HEADER, header_end)
+
+    return headers
+
+
+def find_lock_field(
+    data: bytes | mmap.mmap,
+    pattern: re.Pattern[bytes],
+    field: bytes,
+    start: int,
+    end: int,
+) -> re.Match[bytes] | None:
+    pos = data.find(field, start, end)
+    while pos >= 0:
+        line_start = data.rfind(b"\n", 0, pos) + 1
+        match = pattern.match(data, line_start, end)
+        if match:
+            return match
+        pos = data.find(field, pos + len(field), end)
+    return None
+
 
-    while idx < len(lines):
-        if lines[idx].strip() != "[[package]]":
-            idx += 1
+def scan_lock_packages(
+    data: bytes | mmap.mmap,
+) -> dict[str, tuple[str, int, int] | None]:
+    headers = find_lock_package_headers(data)
+    index: dict[str, tuple[str, int, int] | None] = {}
+
+    for pos, (_, start) in enumerate(headers):
+        end = headers[pos + 1][0] if pos + 1 < len(headers) else len(data)
+        if find_lock_field(data, LOCK_SOURCE_RE, b"source", start, end):
             continue
 
-        end = idx + 1
-        matched_name: str | None = None
-        matched_version: str | None = None
-        has_source = False
-
-        while end < len(lines) and lines[end].strip() != "[[package]]":
-            stripped = lines[end].strip()
-            name_match = re.match(r'^name\s*=\s*"([^"]+)"$', stripped)
-            if name_match:
-                matched_name = name_match.group(1)
-            version_match = re.match(r'^version\s*=\s*"([^"]+)"$', stripped)
-            if version_match:
-                matched_version = version_match.group(1)
-            if stripped.startswith("source = "):
-                has_source = True
-            end += 1
-
-        if matched_name == package_name and not has_source:
-            if matched_version is None:
-                raise VersionSyncError(
-                    f"Missing lockfile version for {package_name} in {path}"
-                )
-            return matched_version
-
-        idx = end
-
-    raise VersionSyncError(f"Cannot find lockfile package '{package_name}' in {path}")
-
-
-def write_lock_package_version(path: Path, package_name: str, new_version: str) -> bool:
-    lines = read_file(path).splitlines(keepends=True)
-    idx = 0
-
-    while idx < len(lines):
-        if lines[idx].strip() != "[[package]]":
-            idx += 1
+        name_match = find_lock_field(data, LOCK_NAME_RE, b"name", start, end)
+        if name_match is None:
+            continue
+        name = name_match.group(1).decode("utf-8")
+        if name in index:
             continue
 
-        end = idx + 1
-        matched_name: str | None = None
-        version_idx: int | None = None
-        has_source = False
+        version_match = find_lock_field(data, LOCK_VERSION_RE, b"version", start, end)
+        if version_match is None:
+            index[name] = None
+            continue
+        version = version_match.group(1).decode("utf-8")
+        index[name] = (version, *version_match.span(1))
+
+    return index
+
 
-        while end < len(lines) and lines[end].strip() != "[[package]]":
-            stripped = lines[end].strip()
-            name_match = re.match(r'^name\s*=\s*"([^"]+)"$', stripped)
-            if name_match:
-                matched_name = name_match.group(1)
+def index_lock_packages(path: Path) -> dict[str, tuple[str, int, int] | None]:
+    key = cache_key(path)
+    index = _LOCK_INDEX_CACHE.get(key)
+    if index is not None:
+        return index
 
-            if re.match(r'^version\s*=\s*"[^"]+"$', stripped):
-                version_idx = end
+    with path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            # mmap cannot map an empty file.
+            index = {}
+        else:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                index = scan_lock_packages(data)
 
-            if stripped.startswith("source = "):
-                has_source = True
+    _LOCK_INDEX_CACHE[key] = index
+    return index
 
-            end += 1
 
-        if matched_name == package_name and not has_source:
-            if version_idx is None:
-                raise VersionSyncError(
-                    f"Missing lockfile version for {package_name} in {path}"
-                )
+def find_lock_package(
+    index: dict[str, tuple[str, int, int] | None],
+    path: Path,
+    package_name: str,
+    action: str,
+) -> tuple[str, int, int]:
+    if package_name not in index:
+        raise VersionSyncError(
+            f"Cannot {action} lockfile package '{package_name}' in {path}"
+        )
+
+    entry = index[package_name]
+    if entry is None:
+        raise VersionSyncError(f"Missing lockfile version for {package_name} in {path}")
+    return entry
 
-            version_line_body, version_line_ending = split_line_ending(
-                lines[version_idx]
-            )
-            match = re.match(
-                r'^(\s*version\s*=\s*")([^"]+)(".*)$',
-                version_line_body,
-            )
-            if not match:
-                raise VersionSyncError(
-                    f"Unexpected lockfile version format at {path}:{version_idx + 1}"
-                )
 
-            if match.group(2) == new_version:
-                return False
+def read_lock_package_version(path: Path, package_name: str) -> str:
+    index = index_lock_packages(path)
+    version, _, _ = find_lock_package(index, path, package_name, "find")
+    return ensure_semver(version, path)
+
+
+def read_lock_packages_version(path: Path, package_names: list[str]) -> str:
+    versions = {name: read_lock_package_version(path, name) for name in package_names}
+    if len(set(versions.values())) > 1:
+        details = ", ".join(f"{name}={version}" for name, version in versions.items())
+        raise VersionSyncError(f"Lockfile package versions differ in {path}: {details}")
+    return versions[package_names[0]]
+
+
+def write_lock_package_versions(
+    path: Path, package_names: list[str], new_version: str
+) -> bool:
+    # Scan the same bytes that get spliced; spans from the cached index would
+    # point at the wrong place if the file changed since it was indexed.
+    data = path.read_bytes()
+    index = scan_lock_packages(data)
+    spans: list[tuple[int, int]] = []
+    for package_name in package_names:
+        version, start, end = find_lock_package(index, path, package_name, "update")
+        if version != new_version:
+            spans.append((start, end))
+
+    if not spans:
+        return False
 
-            lines[version_idx] = (
-                f"{match.group(1)}{new_version}{match.group(3)}{version_line_ending}"
-            )
-            write_file(path, "".join(lines))
-            return True
+    buffer = bytearray(data)
+    encoded = new_version.encode("utf-8")
+    for start, end in sorted(spans, reverse=True):
+        buffer[start:end] = encoded
+    write_file_bytes(path, bytes(buffer))
+    return True
 
-        idx = end
 
-    raise VersionSyncError(f"Cannot update lockfile package '{package_name}' in {path}")
+def group_lock_packages() -> dict[Path, list[str]]:
+    # Entries sharing a lockfile are handled by a single task, so each file is
+    # scanned and rewritten once.
+    grouped: dict[Path, list[str]] = {}
+    for rel_path, package_name in LOCK_PACKAGE_VERSION_FILES:
+        grouped.setdefault(rel_path, []).append(package_name)
+    return grouped
+
+
+@contextmanager
+def file_errors(label: str) -> Iterator[None]:
+    try:
+        yield
+    except (OSError, ValueError) as err:
+        raise VersionSyncError(f"Failed to process {label}: {err}") from err
 
 
 def collect_versions() -> dict[str, str]:
     versions: dict[str, str] = {}
 
     for rel_path in TOML_PACKAGE_VERSION_FILES:
-        version = read_toml_package_version(repo_path(rel_path))
+        with file_errors(str(rel_path)):
+            version = read_toml_package_version(repo_path(rel_path))
         versions[str(rel_path)] = version
 
     for rel_path in JSON_VERSION_FILES:
-        version = read_json_version(repo_path(rel_path))
+        with file_errors(str(rel_path)):
+            version = read_json_version(repo_path(rel_path))
         versions[str(rel_path)] = version
 
-    for rel_path, package_name in LOCK_PACKAGE_VERSION_FILES:
-        version = read_lock_package_version(repo_path(rel_path), package_name)
+    for rel_path, package_names in group_lock_packages().items():
+        with file_errors(str(rel_path)):
+            version = read_lock_packages_version(repo_path(rel_path), package_names)
         versions[str(rel_path)] = version
 
-    for file_path, version in versions.items():
-        if not SEMVER_RE.fullmatch(version):
-            raise VersionSyncError(f"Invalid semver in {file_path}: '{version}'")
-
+    # Every reader validates the version it returns.
     return versions
 
 
@@ -320,43 +486,132 @@ def ensure_consistent(versions: dict[str, str]) -> str:
     raise VersionSyncError("\n".join(lines))
 
 
+def ensure_tag_matches(expected_tag: str | None, version: str) -> None:
+    if expected_tag is None:
+        return
+
+    tag = expected_tag.strip()
+    expected = f"v{version}"
+    if tag == expected:
+        # version is already valid semver, so the tag is well-formed too.
+        return
+    if not (tag.startswith("v") and is_semver(tag[1:])):
+        raise VersionSyncError(
+            f"Invalid tag '{tag}'. Expected format vMAJOR.MINOR.PATCH with optional prerelease/build"
+        )
+    raise VersionSyncError(
+        f"Tag/version mismatch: tag is '{tag}', but files are '{version}' (expected tag '{expected}')"
+    )
+
+
 def run_check(expected_tag: str | None) -> str:
+    clear_caches()
     versions = collect_versions()
     version = ensure_consistent(versions)
+    ensure_tag_matches(expected_tag, version)
+    return version
 
-    if expected_tag is not None:
-        tag = expected_tag.strip()
-        if not TAG_RE.fullmatch(tag):
-            raise VersionSyncError(
-                f"Invalid tag '{tag}'. Expected format vMAJOR.MINOR.PATCH with optional prerelease/build"
-            )
-        expected = f"v{version}"
-        if tag != expected:
-            raise VersionSyncError(
-                f"Tag/version mismatch: tag is '{tag}', but files are '{version}' (expected tag '{expected}')"
-            )
 
-    return version
+def file_signature(path: Path) -> list[int]:
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_set_cache() -> dict[str, Any]:
+    cache_path = repo_path(SET_CACHE_FILE)
+    try:
+        cache_mtime_ns = cache_path.stat().st_mtime_ns
+        cache = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    # Drop racy entries so their files are read and verified by the writer.
+    trusted_before_ns = cache_mtime_ns - RACY_MTIME_SLACK_NS
+    return {
+        label: entry
+        for label, entry in cache.items()
+        if isinstance(entry, list)
+        and entry
+        and isinstance(entry[0], int)
+        and entry[0] <= trusted_before_ns
+    }
+
+
+def save_set_cache(labels: list[str], version: str) -> None:
+    try:
+        entries = {
+            label: [*file_signature(repo_path(Path(label))), version]
+            for label in labels
+        }
+        write_file(
+            repo_path(SET_CACHE_FILE),
+            json.dumps(entries, indent=2, ensure_ascii=True) + "\n",
+        )
+    except OSError:
+        pass  # the cache is only an optimization
+
+
+def is_cached(set_cache: dict[str, Any], label: str, new_version: str) -> bool:
+    # Unchanged mtime and size since a set of the same version means the file
+    # still holds that version, so it does not even need to be read.
+    signature = [*file_signature(repo_path(Path(label))), new_version]
+    return bool(set_cache.get(label) == signature)
+
+
+def ensure_written(label: str, version: str, new_version: str) -> None:
+    # Read back only the files that were rewritten: cheap, and it stops a splice
+    # that landed in the wrong place from being reported as a success.
+    if version != new_version:
+        raise VersionSyncError(
+            f"{label} holds '{version}' after writing '{new_version}'"
+        )
 
 
 def run_set(version_input: str, expected_tag: str | None) -> tuple[str, list[str]]:
     new_version = normalize_version(version_input)
+    ensure_tag_matches(expected_tag, new_version)
+    clear_caches()
+    set_cache = load_set_cache()
+    labels: list[str] = []
     changed_files: list[str] = []
 
     for rel_path in TOML_PACKAGE_VERSION_FILES:
-        if write_toml_package_version(repo_path(rel_path), new_version):
-            changed_files.append(str(rel_path))
+        label = str(rel_path)
+        labels.append(label)
+        with file_errors(label):
+            if is_cached(set_cache, label, new_version):
+                continue
+            path = repo_path(rel_path)
+            if write_toml_package_version(path, new_version):
+                changed_files.append(label)
+                ensure_written(label, read_toml_package_version(path), new_version)
 
     for rel_path in JSON_VERSION_FILES:
-        if write_json_version(repo_path(rel_path), new_version):
-            changed_files.append(str(rel_path))
-
-    for rel_path, package_name in LOCK_PACKAGE_VERSION_FILES:
-        if write_lock_package_version(repo_path(rel_path), package_name, new_version):
-            changed_files.append(str(rel_path))
-
-    verified = run_check(expected_tag)
-    return verified, changed_files
+        label = str(rel_path)
+        labels.append(label)
+        with file_errors(label):
+            if is_cached(set_cache, label, new_version):
+                continue
+            path = repo_path(rel_path)
+            if write_json_version(path, new_version):
+                changed_files.append(label)
+                ensure_written(label, read_json_version(path), new_version)
+
+    for rel_path, package_names in group_lock_packages().items():
+        label = str(rel_path)
+        labels.append(label)
+        with file_errors(label):
+            if is_cached(set_cache, label, new_version):
+                continue
+            path = repo_path(rel_path)
+            if write_lock_package_versions(path, package_names, new_version):
+                changed_files.append(label)
+                version = read_lock_packages_version(path, package_names)
+                ensure_written(label, version, new_version)
+
+    save_set_cache(labels, new_version)
+    return new_version, changed_files
 
 
 def build_parser() -> argparse.ArgumentParser: